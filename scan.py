@@ -23,6 +23,14 @@ Options:
     -c PAGES       Page count to scan [default: all pages from ADF]
     
     --no-shrink    Do not shrink resulting pdf.
+    --auto-res     Instead of shrinking the resulting pdf, scan at the lowest
+                   resolution that is not below the shrinking target (this
+                   overrides -r). Has no effect together with --no-shrink.
+    --cache        Look up the result in the cache, and store it there. Cached
+                   documents are kept in ~/.cache/pydigitize until removed
+                   manually.
+    --pdfa         Generate a PDF/A file for archival. This needs an additional
+                   (slow) conversion step.
     --nowait       When scanning multiple pages (with the -c parameter), don't
                    wait for manual confirmation but scan as fast as the scanner
                    can process the pages.
@@ -32,44 +40,161 @@ Options:
 
 """
 import datetime
-import glob
+import hashlib
+import importlib.util
+import io
 import logging
+import multiprocessing
 import os.path
 import re
+import shutil
+import subprocess
 import sys
 import tempfile
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import docopt
-from sh import cd, mv
 
-try:
-    from sh import scanimage
-except ImportError:
-    print('Error: scanimage command not found. Please install sane.')
-    sys.exit(1)
 
-try:
-    from sh import tiffcp, tiff2pdf
-except ImportError:
-    print('Error: tiffcp / tiff2pdf commands not found. Please install libtiff.')
-    sys.exit(1)
+logger = logging.getLogger('pydigitize')
 
-try:
-    from sh import gs
-except ImportError:
-    print('Error: gs commands not found. Please install ghostscript.')
-    sys.exit(1)
 
+VALID_RESOLUTIONS = (100, 200, 300, 400, 600)
+OCR_ARGS = {'language': 'deu', 'deskew': True, 'clean': True}
+# Single pages are OCR'd by one process per CPU core (see _init_ocr_worker)
+PAGE_OCR_ARGS = dict(OCR_ARGS, output_type='pdf', jobs=1)
 
-logger = logging.getLogger('pydigitize')
+SHRINK_RESOLUTION = 185
+SHRINK_JPEG_QUALITY = 75
+AUTO_RESOLUTION = min(r for r in VALID_RESOLUTIONS if r >= SHRINK_RESOLUTION)
 
+# With --cache, finished documents are kept here by the hash of the scanned
+# images and the processing settings. Nothing is ever evicted.
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'pydigitize'
+)
+
+# Intermediate files are kept on tmpfs if there is enough space for them
+TMPFS = '/dev/shm'
+TMPFS_PAGE_SIZE = 25 * 1024 * 1024  # Uncompressed A4 page at 300 dpi
+TMPFS_ADF_PAGES = 50  # Assumed page count when scanning all pages from ADF
+
+
+def _slug(text: str) -> str:
+    """
+    Turn text into a lowercase ASCII string that is safe to use in filenames.
+
+    Accented letters are transliterated to their base letters first (and
+    "ß" to "ss", which has no decomposition).
+
+    """
+    text = unicodedata.normalize('NFKD', text.replace('ß', 'ss')).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'scan'
+
+
+def check_requirements():
+    """
+    Exit with an error message if a required command or module is missing.
+
+    Modules are only looked up here. They are imported by the stages that
+    use them, so that startup stays fast.
+
+    """
+    if shutil.which('scanimage') is None:
+        print('Error: scanimage command not found. Please install sane.')
+        sys.exit(1)
+
+    if shutil.which('tesseract') is None:
+        print('Error: tesseract command not found. Please install tesseract.')
+        sys.exit(1)
+
+    if shutil.which('unpaper') is None:
+        print('Error: unpaper command not found. Please install unpaper.')
+        sys.exit(1)
+
+    if any(importlib.util.find_spec(m) is None for m in ('ocrmypdf', 'pikepdf', 'PIL')):
+        print('Error: ocrmypdf / pikepdf modules not found. Please install OCRmyPDF.')
+        sys.exit(1)
+
+    if importlib.util.find_spec('tifffile') is None:
+        print('Error: tifffile module not found. Please install tifffile.')
+        sys.exit(1)
+
+
+def _stdout():
+    """
+    Only show the output of external commands when debugging.
+    """
+    return None if logger.isEnabledFor(logging.DEBUG) else subprocess.DEVNULL
+
+
+def _spawn_args(argv):
+    """
+    Return ``subprocess`` arguments that allow starting ``argv`` cheaply.
+
+    With an absolute executable path, ``close_fds=False`` and no ``cwd``,
+    ``subprocess`` uses ``posix_spawn()`` instead of ``fork()`` and ``exec()``,
+    so the cost of starting a command does not grow with our memory usage.
+    Our own file descriptors are not inheritable anyway.
+
+    """
+    executable = shutil.which(argv[0]) or argv[0]
+    return {'args': [executable] + list(argv[1:]), 'close_fds': False}
+
+
+def _run(*argv, ok_codes=(0,), capture=False):
+    """
+    Run an external command and wait for it to finish.
+
+    Raise ``subprocess.CalledProcessError`` if the exit code is not one of
+    ``ok_codes``. If ``capture`` is set, return the standard output.
+
+    """
+    logger.debug('Running %r', argv)
+    stdout = subprocess.PIPE if capture else _stdout()
+    proc = subprocess.run(stdout=stdout, **_spawn_args(argv))
+    if proc.returncode not in ok_codes:
+        raise subprocess.CalledProcessError(proc.returncode, argv)
+    return proc.stdout
 
-VALID_RESOLUTIONS = (100, 200, 300, 400, 600)
 
+def _init_ocr_worker():
+    """
+    Keep Tesseract in an OCR worker process to a single thread.
 
-def prefix():
-    duration = (datetime.datetime.now() - START_TIME).total_seconds()
-    return '\033[92m\033[1m+\033[0m [{0:>5.2f}s] '.format(duration)
+    The workers already run one per CPU core, additional OpenMP threads would
+    only oversubscribe the CPU.
+
+    """
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _ocr_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Create a process pool for OCR workers.
+
+    Pages are submitted from the reader thread, so the workers are
+    started by a fork server rather than forked from a multi-threaded process.
+
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_ocr_worker,
+        mp_context=multiprocessing.get_context('forkserver'),
+    )
+
+
+def _shrink_image(image, size):
+    """
+    Downsample an image to ``size`` and encode it as JPEG.
+    """
+    from PIL import Image
+
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    buf = io.BytesIO()
+    image.save(buf, 'JPEG', quality=SHRINK_JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
 
 
 class Scan:
@@ -81,7 +206,8 @@ class Scan:
         name: str = None,
         datestring: str = None,
         count: int = None,
-        nowait: bool = False
+        nowait: bool = False,
+        pdfa: bool = False
     ):
         """
         Initialize scan class.
@@ -92,8 +218,11 @@ class Scan:
         - device
         - output_path
         - count
+        - pdfa
 
         """
+        self._timestamp = datetime.datetime.now()
+
         # Validate and store resolution
         def _invalid_res():
             print('Invalid resolution. Please use one of {!r}.'.format(VALID_RESOLUTIONS))
@@ -109,15 +238,15 @@ class Scan:
         # Store device
         self.device = device
 
-        # set timestamp
-        Timestamp = START_TIME.strftime('%Y%m%d') + 'Z'
-        
         # Validate and store output path
         if os.path.isdir(output):
             if name is None:
-                filename = '{}.pdf'.format(timestamp)
+                filename = '{}.pdf'.format(self.timestamp_str)
             else:
-                filename = name
+                # Allow "-n invoice.pdf" without doubling the extension
+                if name.lower().endswith('.pdf'):
+                    name = name[:-len('.pdf')]
+                filename = '{}.pdf'.format(_slug(name))
             output_path = os.path.join(output, filename)
         elif os.path.dirname(output) == '' or os.path.isdir(os.path.dirname(output)):
             output_path = output
@@ -131,6 +260,23 @@ class Scan:
         self.count = count
         self.nowait = nowait
 
+        # Store output type
+        self.pdfa = pdfa
+
+    @property
+    def timestamp_str(self) -> str:
+        """
+        The date of the scan, as used in default filenames.
+        """
+        return self._timestamp.strftime('%Y%m%d') + 'Z'
+
+    def prefix(self) -> str:
+        """
+        Return the prefix for progress messages, with the time since start.
+        """
+        duration = (datetime.datetime.now() - self._timestamp).total_seconds()
+        return '\033[92m\033[1m+\033[0m [{0:>5.2f}s] '.format(duration)
+
     def prepare_directories(self):
         """
         Prepare the temporary output directories.
@@ -140,107 +286,368 @@ class Scan:
         - workdir
 
         """
-        print(prefix() + 'Creating temporary directory...')
-        self.workdir = tempfile.mkdtemp(prefix='pydigitize-')
+        print(self.prefix() + 'Creating temporary directory...')
+        pages = self.count or TMPFS_ADF_PAGES
+        required = pages * TMPFS_PAGE_SIZE * (int(self.resolution) / 300) ** 2
+        try:
+            if shutil.disk_usage(TMPFS).free < required:
+                raise OSError('Not enough space on %s' % TMPFS)
+            self.workdir = tempfile.mkdtemp(prefix='pydigitize-', dir=TMPFS)
+        except OSError as e:
+            logger.debug('Not using tmpfs: %s', e)
+            self.workdir = tempfile.mkdtemp(prefix='pydigitize-')
+        logger.debug('Working directory: %s', self.workdir)
+
+    def path(self, filename: str) -> str:
+        """
+        Return the path of a file in the working directory.
+        """
+        return os.path.join(self.workdir, filename)
 
     def scan_pages(self):
         """
         Scan pages using ``scanimage``.
+
+        Every page is handed to ``page_scanned`` as soon as it is complete, so
+        that it can be OCR'd while the next page is scanning. Single pages
+        are read from the standard output of ``scanimage``, only ADF batch
+        scans go through ``out*.tif`` files.
+
         """
-        def _scan_page(number: int = None):
-            if number is None:
-                print(prefix() + 'Scanning all pages...')
-            else:
-                print(prefix() + 'Scanning page %d/%d...' % (number + 1, self.count))
-            scanimage_args = {
-                'x': 210, 'y': 297,
-                'batch': 'out%d.tif',
-                'batch-start': '1000',  # Avoid issues with sorting (e.g. out10 < out2)
-                'format': 'tiff',
-                'resolution': self.resolution,
-                '_ok_code': [0, 7],
-            }
+        def _scan_args(batch: bool):
+            scanimage_args = [
+                'scanimage',
+                '-x', '210', '-y', '297',
+                '--format=tiff',
+                '--resolution=%s' % self.resolution,
+            ]
             if self.device is not None:
-                scanimage_args['device_name'] = self.device
-            if number is not None:
-                scanimage_args['batch-start'] = number
-                scanimage_args['batch-count'] = 1
+                scanimage_args.append('--device-name=%s' % self.device)
+            if batch:
+                # Escape the working directory for scanimage's format string
+                pattern = os.path.join(self.workdir.replace('%', '%%'), 'out%d.tif')
+                scanimage_args.append('--batch=%s' % pattern)
+                scanimage_args.append('--batch-print')
             logger.debug('Scanimage args: %r' % scanimage_args)
-
-            scanimage(**scanimage_args)
+            return scanimage_args
 
         if self.count:
             for i in range(self.count):
-                _scan_page(i)
+                print(self.prefix() + 'Scanning page %d/%d...' % (i + 1, self.count))
+                data = _run(*_scan_args(False), ok_codes=(0, 7), capture=True)
+                if data:
+                    self.page_scanned(data)
                 if not self.nowait and i < (self.count - 1):
                     try:
                         msg = 'Press <ENTER> to scan page %d (or <CTRL+C> to abort)'
-                        input(prefix() + msg % (i + 2))
+                        input(self.prefix() + msg % (i + 2))
                     except KeyboardInterrupt:
                         print()
-                        print(prefix() + 'Aborting.')
+                        print(self.prefix() + 'Aborting.')
                         sys.exit(1)
         else:
-            _scan_page(None)
+            print(self.prefix() + 'Scanning all pages...')
+            argv = _scan_args(True)
+            scan = subprocess.Popen(
+                stdout=subprocess.PIPE, universal_newlines=True, **_spawn_args(argv)
+            )
+
+            # With --batch-print, scanimage prints the filename of every page
+            # as soon as it is complete
+            for line in scan.stdout:
+                logger.debug('Scanimage: %s', line.rstrip())
+                self.page_scanned(os.path.basename(line.strip()))
+            scan.wait()
+            if scan.returncode not in (0, 7):
+                raise subprocess.CalledProcessError(scan.returncode, argv)
+
+    def page_scanned(self, page):
+        """
+        Queue a scanned page for reading and OCR.
+
+        The page is either the filename of a tiff in the working directory, or
+        the tiff itself as ``bytes``.
 
-    def combine_tiffs(self):
         """
-        Combine tiffs into single multi-page tiff.
+        if isinstance(page, bytes):
+            logger.debug('Queueing page with %d bytes', len(page))
+            future = self._reader.submit(self.add_tiff_data, page)
+        else:
+            logger.debug('Queueing %s', page)
+            future = self._reader.submit(self.add_tiff, page)
+        self._queued.append(future)
+
+    def page_key(self, image) -> str:
         """
-        print(prefix() + 'Combining image files...')
-        files = sorted(glob.glob('out*.tif'))
-        logger.debug('Joining %r', files)
-        tiffcp(files, 'output.tif', c='lzw')
+        Return the hash of the image data of a page.
 
-    def convert_tiff_to_pdf(self):
+        The hash is also recorded in ``_page_keys``, so that pages with
+        identical image data are only OCR'd once.
+
+        """
+        key = hashlib.sha256(image.tobytes()).hexdigest()
+        self._page_keys.append(key)
+        return key
+
+    def add_tiff(self, filename: str):
+        """
+        Submit a single page from the working directory for OCR.
+        """
+        import tifffile
+
+        logger.debug('Adding %s', filename)
+        key = self.page_key(tifffile.imread(self.path(filename), key=0))
+        self.submit_ocr(key, self.path(filename))
+
+    def add_tiff_data(self, data: bytes):
         """
-        Convert tiff to pdf.
+        Submit a single page held in memory for OCR.
 
-        TODO: use convert instead?
+        The page is OCR'd from the scanned tiff itself, so it is only decoded
+        for hashing.
 
         """
-        print(prefix() + 'Converting to PDF...')
-        tiff2pdf('output.tif', p='A4', o='output.pdf')
-        
-    def shrink_pdf(self):
+        import tifffile
+
+        key = self.page_key(tifffile.imread(io.BytesIO(data), key=0))
+        self.submit_ocr(key, io.BytesIO(data))
+
+    def submit_ocr(self, key: str, source):
+        """
+        Submit a scanned page (a tiff path or file object) for OCR.
+
+        Pages are OCR'd while the next one is being scanned, one page per CPU
+        core. A page with the same image data as an already submitted page
+        (e.g. a blank sheet) is not OCR'd again.
+
+        """
+        import ocrmypdf
+
+        number = len(self._ocr_sources)
+        if key not in self._ocr_pages:
+            logger.debug('Submitting page %d for OCR', number)
+            self._ocr_pages[key] = number
+            self._ocr_futures.append(self._ocr_executor.submit(
+                ocrmypdf.ocr, source, self.path('clean%d.pdf' % number), **self.ocr_args(PAGE_OCR_ARGS)
+            ))
+        self._ocr_sources.append(self._ocr_pages[key])
+
+    def wait_for_pages(self):
+        """
+        Wait until all scanned pages have been submitted for OCR.
+        """
+        self._reader.shutdown(wait=True)
+        for future in self._queued:
+            future.result()
+        logger.debug('Read %d pages', len(self._queued))
+
+    def do_ocr(self):
+        """
+        Run OCR, straightening and cleanup.
+
+        The pages were already submitted for OCR while scanning (see
+        ``submit_ocr``), so this waits for them and merges the results.
+
+        """
+        print(self.prefix() + 'Running OCR...')
+        logger.debug(
+            'Waiting for OCR of %d of %d pages', len(self._ocr_futures), len(self._ocr_sources)
+        )
+        with self._ocr_executor:
+            for future in self._ocr_futures:
+                future.result()
+        self.merge_pages(self._ocr_sources)
+        if self.pdfa:
+            self.convert_to_pdfa()
+
+    def ocr_args(self, args: dict) -> dict:
+        """
+        Return the ``ocrmypdf`` arguments for this scan.
+
+        The results are usually rewritten afterwards (by ``merge_pages`` or
+        ``shrink_pdf``), so they are never linearized. If the PDF is shrunk by
+        ``shrink_pdf`` afterwards, ``ocrmypdf`` does not need to optimize it
+        either.
+
+        """
+        args = dict(args, fast_web_view=1e6, progress_bar=False)
+        if not self.no_shrink:
+            args['optimize'] = 0
+        return args
+
+    def merge_pages(self, sources):
+        """
+        Merge the single OCR'd pages into one document.
+
+        For every page of the document, ``sources`` contains the number of the
+        OCR'd page to use.
+
+        """
+        import pikepdf
+
+        pages = {number: pikepdf.open(self.path('clean%d.pdf' % number)) for number in set(sources)}
+        with pikepdf.new() as merged:
+            for source in sources:
+                merged.pages.extend(pages[source].pages)
+            merged.save(self.path('clean.pdf'))
+        for page in pages.values():
+            page.close()
+
+    def convert_to_pdfa(self):
+        """
+        Convert the merged document to PDF/A.
+
+        All pages already contain text, so OCR is skipped and only the PDF/A
+        conversion (usually done by Ghostscript, on a single core) runs.
+
+        """
+        import ocrmypdf
+
+        print(self.prefix() + 'Converting to PDF/A...')
+        os.replace(self.path('clean.pdf'), self.path('merged.pdf'))
+        ocrmypdf.ocr(
+            self.path('merged.pdf'), self.path('clean.pdf'),
+            **self.ocr_args({'output_type': 'pdfa', 'skip_text': True}),
+        )
+
+    def shrink_pdf(self, output_path: str):
         """
         Shrink pdf.
+
+        Color and grayscale images are downsampled to ``SHRINK_RESOLUTION``
+        and recompressed as JPEG, one image per CPU core. Other images (e.g.
+        bilevel or masked ones) are left untouched.
+
+        The result is written to ``output_path`` directly, so that it does not
+        have to be copied out of the working directory (which may be on
+        another filesystem) afterwards.
+
         """
-        print(prefix() + 'Shrinking PDF...')
-        gs_args = ['q', 'dNOPAUSE', 'dBATCH', 'dSAFER', 'sDEVICE=pdfwrite', 
-                   'dCompatibilityLevel=1.3', 'dPDFSETTINGS=/screen', 
-                   'dEmbedAllFonts=true', 'dSubsetFonts=true', 
-                   'dColorImageDownsampleType=/Bicubic', 'dColorImageResolution=185',
-                   'dGrayImageDownsampleType=/Bicubic', 'dGrayImageResolution=185',
-                   'dMonoImageDownsampleType=/Bicubic', 'dMonoImageResolution=185']
-        gs_args.extend(['sOutputFile=output.pdf', 'clean.pdf'])
-        gs(*args)
-        
-    def process(self, *, no_shrink=False):
-        # Prepare directories
-        self.prepare_directories()
-        cd(self.workdir)
+        import pikepdf
+
+        print(self.prefix() + 'Shrinking PDF...')
+        with pikepdf.open(self.path('clean.pdf')) as pdf:
+            jobs = {}
+            for page in pdf.pages:
+                page_width = float(page.mediabox[2] - page.mediabox[0]) / 72  # inches
+                # Page.images is deprecated since pikepdf 9
+                images = page.get_images(recursive=False) if hasattr(page, 'get_images') else page.images
+                for image in images.values():
+                    if image.objgen in jobs or '/SMask' in image or '/Decode' in image:
+                        continue
+                    try:
+                        pdfimage = pikepdf.PdfImage(image)
+                        if pdfimage.bits_per_component != 8 or pdfimage.mode not in ('L', 'RGB'):
+                            continue
+                        scale = min(1, SHRINK_RESOLUTION / (pdfimage.width / page_width))
+                        if scale == 1 and pdfimage.filters == ['/DCTDecode']:
+                            continue
+                        pil_image = pdfimage.as_pil_image()
+                    except (NotImplementedError, pikepdf.UnsupportedImageTypeError, pikepdf.PdfError) as e:
+                        # Color spaces or filters that pikepdf cannot decode
+                        logger.debug('Not shrinking image %r: %s', image.objgen, e)
+                        continue
+                    size = (max(1, round(pdfimage.width * scale)),
+                            max(1, round(pdfimage.height * scale)))
+                    jobs[image.objgen] = (image, pil_image, size)
+
+            logger.debug('Shrinking %d images', len(jobs))
+            if jobs:
+                with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                    futures = [
+                        (image, size, executor.submit(_shrink_image, pil_image, size))
+                        for image, pil_image, size in jobs.values()
+                    ]
+                    for image, size, future in futures:
+                        image.write(future.result(), filter=pikepdf.Name.DCTDecode)
+                        image.Width, image.Height = size
+                        if '/DecodeParms' in image:
+                            del image.DecodeParms
+
+            pdf.save(output_path)
+
+    def cache_path(self, *, no_shrink: bool) -> str:
+        """
+        Return the cache path for the scanned pages.
 
-        # Scan pages
-        self.scan_pages()
+        The key covers the image data of every page as well as all settings
+        that affect the resulting document.
 
-        # Combine tiffs into single multi-page tiff
-        self.combine_tiffs()
+        """
+        digest = hashlib.sha256()
+        for key in self._page_keys:
+            digest.update(key.encode())
+        settings = (
+            self.resolution, sorted(OCR_ARGS.items()), sorted(PAGE_OCR_ARGS.items()),
+            SHRINK_RESOLUTION, SHRINK_JPEG_QUALITY, self.pdfa, no_shrink,
+        )
+        digest.update(repr(settings).encode())
+        return os.path.join(CACHE_DIR, '{}.pdf'.format(digest.hexdigest()))
+
+    def store_in_cache(self, path: str, cache_path: str):
+        """
+        Atomically copy a finished document into the cache.
+        """
+        logger.debug('Caching %s as %s', path, cache_path)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, cache_path)
 
-        # Convert tiff to pdf
-        self.convert_tiff_to_pdf()
+    def process(self, *, no_shrink=False, cache=False):
+        check_requirements()
+        self.no_shrink = no_shrink
 
-        # Shrink
-        if no_shrink is False:
-            self.shrink_pdf()
-            filename = 'clean.pdf'
-        else:
-            filename = 'output.pdf'
+        # Prepare directories
+        self.prepare_directories()
 
-        # Move file
-        print(prefix() + 'Moving resulting file...')
-        cd('..')
-        mv('{}/{}'.format(self.workdir, filename), self.output_path)
+        self._reader = None
+        self._ocr_executor = None
+        try:
+            # Scan pages, reading them in the background
+            self._reader = ThreadPoolExecutor(max_workers=1)
+            self._queued = []
+            self._page_keys = []
+
+            # Run OCR on every page while the next one is being scanned
+            self._ocr_executor = _ocr_pool(os.cpu_count() or 1)
+            self._ocr_pages = {}
+            self._ocr_futures = []
+            self._ocr_sources = []
+
+            self.scan_pages()
+
+            # Wait for all pages to be submitted for OCR
+            self.wait_for_pages()
+
+            # Reuse the result of an earlier run on the same images
+            cache_path = self.cache_path(no_shrink=no_shrink) if cache else None
+            if cache_path is not None and os.path.exists(cache_path):
+                print(self.prefix() + 'Using cached result...')
+                self._ocr_executor.shutdown(cancel_futures=True)
+                shutil.copy(cache_path, self.output_path)
+            else:
+                # Run OCR
+                self.do_ocr()
+
+                # Shrink straight into the output file, or move the file
+                if no_shrink is False:
+                    self.shrink_pdf(self.output_path)
+                else:
+                    print(self.prefix() + 'Moving resulting file...')
+                    shutil.move(self.path('clean.pdf'), self.output_path)
+
+                # Cache file
+                if cache_path is not None:
+                    self.store_in_cache(self.output_path, cache_path)
+        finally:
+            # Drop queued pages (e.g. after Ctrl+C) and wait for running jobs
+            # before their working directory is removed
+            if self._reader is not None:
+                self._reader.shutdown(cancel_futures=True)
+            if self._ocr_executor is not None:
+                self._ocr_executor.shutdown(cancel_futures=True)
+            shutil.rmtree(self.workdir, ignore_errors=True)
 
         print('\nDone: %s' % self.output_path)
 
@@ -271,6 +678,9 @@ if __name__ == '__main__':
         kwargs['output'] = args['OUTPUT']
     if args['--no-shrink'] is True:
         no_shrink = True
+    elif args['--auto-res'] is True:
+        kwargs['resolution'] = AUTO_RESOLUTION
+        no_shrink = True
     if args['-n']:
         kwargs['name'] = args['-n']
     if args['-c']:
@@ -283,10 +693,11 @@ if __name__ == '__main__':
                 print('Invalid argument to "-c": %r -> must be numeric!' % args['-c'])
                 sys.exit(1)
     kwargs['nowait'] = args['--nowait']
+    kwargs['pdfa'] = args['--pdfa']
 
     print('                           ____')
     print('  ________________________/ O  \___/')
     print(' <_/_\_/_\_/_\_/_\_/_\_/_______/   \\\n')
 
     scan = Scan(**kwargs)
-    scan.process(no_shrink=no_shrink)
+    scan.process(no_shrink=no_shrink, cache=args['--cache'])